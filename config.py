@@ -9,6 +9,7 @@ GESTURE_THRESHOLD = 0.05 # 手势识别阈值
 CLICK_COOLDOWN = 0.15    # 点击冷却时间（降低以提高灵敏度）
 SCROLL_COOLDOWN = 0.05   # 滚动冷却时间（降低以提高灵敏度）
 SWIPE_COOLDOWN = 0.2     # 滑动冷却时间
+MIN_CLICK_INTERVAL = 0.1 # 鼠标控制器两次点击之间的最短间隔
 
 # 摄像头设置
 CAMERA_INDEX = 0         # 摄像头索引（0为默认摄像头）
@@ -16,17 +17,30 @@ FRAME_WIDTH = 640        # 视频帧宽度
 FRAME_HEIGHT = 480       # 视频帧高度
 FPS = 30                 # 帧率
 
+# 推理设置
+MODEL_COMPLEXITY = 0     # 手部关键点模型复杂度（0 为轻量模型，速度更快；1 为完整模型）
+INFERENCE_EVERY_N_FRAMES = 2  # 跟踪到手时每 N 帧推理一次，中间帧复用上次结果（1 为每帧推理）
+INFERENCE_SCALE = 0.5    # 送入 MediaPipe 前的缩放比例（1.0 为原始分辨率）
+USE_OPENCL = True        # 有可用的 OpenCL 设备时用 GPU 做缩放和颜色转换
+
 # 显示设置
 SHOW_CAMERA_FEED = True  # 是否显示摄像头画面
 SHOW_HAND_LANDMARKS = True  # 是否显示手部关键点
+RENDER_EVERY_N_FRAMES = 2   # 每 N 帧刷新一次画面（1 为每帧刷新）
 
 # 手势识别参数
 PINCH_THRESHOLD = 0.05   # 捏合手势阈值（拇指和食指距离，放宽以更灵敏）
 FIST_THRESHOLD = 0.08    # 握拳手势阈值（需要握得非常紧）
 SWIPE_THRESHOLD = 0.04   # 五指张开滑动阈值（降低以更灵敏）
 
+# 阈值的平方（手势判断直接比较平方距离，省去开方运算）
+PINCH_THRESHOLD_SQ = PINCH_THRESHOLD ** 2
+FIST_THRESHOLD_SQ = FIST_THRESHOLD ** 2
+
 # 鼠标移动平滑参数
-SMOOTH_FACTOR = 0.5      # 平滑系数（降低平滑增加跟手性）
+SMOOTH_WINDOW_N = 3      # 平滑窗口帧数，效果相当于 N 帧滑动平均，平滑系数取 (N-1)/(N+1)（1 表示不平滑，越小越跟手）
+SMOOTH_FACTOR = 0.5      # 平滑系数（仅在 SMOOTH_WINDOW_N 设为 None 时直接使用）
+JITTER_PX_SCALE = 4      # 防抖死区比例：x、y 方向的移动都小于 (1-平滑系数)*JITTER_PX_SCALE 像素（至少 1）时不移动鼠标
 
 # 屏幕映射区域（将手部检测区域映射到屏幕）
 SCREEN_PADDING = 50      # 屏幕边缘预留像素（减少padding增加可用区域）
@@ -4,18 +4,93 @@
 """
 
 import cv2
+import mediapipe as mp
 import numpy as np
+from numba import njit
 import time
 import config
 
 
+# fill_finger_tip_positions 返回数组中各关键点所在的行
+THUMB, INDEX, MIDDLE, RING, PINKY, WRIST, PALM = range(7)
+# 对应的 MediaPipe 关键点编号（拇指尖、食指尖、中指尖、无名指尖、小指尖、手腕、手掌中心）
+FINGER_LANDMARK_IDS = (4, 8, 12, 16, 20, 0, 9)
+
+# classify_hand 返回的手势标志位（可同时成立多个）
+GESTURE_PINCH = 1             # 拇指食指捏合
+GESTURE_FIST = 2              # 握拳
+GESTURE_INDEX_ONLY = 4        # 只有食指伸出
+GESTURE_THUMB_INDEX_OPEN = 8  # 食指和拇指张开
+GESTURE_OPEN_HAND = 16        # 五指张开
+
+
+@njit(cache=True)
+def classify_hand(pts, thresholds):
+    """
+    根据关键点一次性判断全部手势（比较平方距离，不开方）
+    pts: fill_finger_tip_positions 返回的 (7, 3) 数组
+    thresholds: [捏合阈值的平方, 握拳阈值的平方]
+    返回: 成立的 GESTURE_* 标志按位或的结果
+    """
+    pinch_sq = thresholds[0]
+    fist_sq = thresholds[1]
+    
+    # 五个指尖到手掌中心的平方距离
+    d = np.empty(5)
+    for i in range(5):
+        acc = 0.0
+        for k in range(3):
+            diff = pts[i, k] - pts[PALM, k]
+            acc += diff * diff
+        d[i] = acc
+    
+    # 拇指和食指的平方距离
+    thumb_index_sq = 0.0
+    for k in range(3):
+        diff = pts[THUMB, k] - pts[INDEX, k]
+        thumb_index_sq += diff * diff
+    
+    flags = 0
+    
+    # 捏合：拇指食指很近即可，不管其他手指状态
+    if thumb_index_sq < pinch_sq:
+        flags |= GESTURE_PINCH
+    
+    # 握拳：均方根距离很小且所有手指都收拢，拇指和食指必须收拢
+    if (d.sum() < 5.0 * fist_sq and
+            d.max() < 4.0 * fist_sq and
+            d[THUMB] < 0.10 ** 2 and
+            d[INDEX] < 0.10 ** 2):
+        flags |= GESTURE_FIST
+    
+    # 只有食指伸出（放宽食指阈值，严格其他手指）
+    if (d[INDEX] > 0.14 ** 2 and
+            d[MIDDLE] < 0.12 ** 2 and
+            d[RING] < 0.12 ** 2 and
+            d[PINKY] < 0.12 ** 2):
+        flags |= GESTURE_INDEX_ONLY
+    
+    # 食指和拇指都伸出，且距离较远（张开状态）
+    if (d[THUMB] > 0.12 ** 2 and
+            d[INDEX] > 0.15 ** 2 and
+            thumb_index_sq > pinch_sq):
+        flags |= GESTURE_THUMB_INDEX_OPEN
+    
+    # 五指都必须伸展（更严格的条件，避免单食指误触）
+    if (d[THUMB] > 0.13 ** 2 and
+            d[INDEX] > 0.15 ** 2 and
+            d[MIDDLE] > 0.14 ** 2 and
+            d[RING] > 0.14 ** 2 and
+            d[PINKY] > 0.14 ** 2):
+        flags |= GESTURE_OPEN_HAND
+    
+    return flags
+
+
 class GestureDetector:
     def __init__(self):
         # 初始化 MediaPipe 手部检测
-        # 动态导入以兼容不同版本
-        import mediapipe as mp
-        
-        # 尝试访问 solutions
+        # 尝试访问 solutions（兼容不同版本）
         if hasattr(mp, 'solutions'):
             mp_hands_module = mp.solutions.hands
             mp_drawing_module = mp.solutions.drawing_utils
@@ -31,7 +106,8 @@ class GestureDetector:
         self.hands = mp_hands_module.Hands(
             static_image_mode=False,
             max_num_hands=1,  # 只检测一只手
-            min_detection_confidence=0.7,
+            model_complexity=config.MODEL_COMPLEXITY,
+            min_detection_confidence=0.6,
             min_tracking_confidence=0.5
         )
         
@@ -46,18 +122,83 @@ class GestureDetector:
         self.is_pinching = False  # 是否正在捏合（用于持续左键）
         self.pinch_start_time = 0  # 捏合开始时间
         
+        # 时间均使用 time.monotonic_ns() 的整数纳秒，冷却时间预先换算
+        self._click_cooldown_ns = int(config.CLICK_COOLDOWN * 1e9)
+        self._scroll_cooldown_ns = int(config.SCROLL_COOLDOWN * 1e9)
+        self._drag_delay_ns = 1_000_000_000  # 捏合超过1秒才允许拖拽
+        
+        # 关键点坐标缓冲区（预先分配，每帧原地更新）
+        self._pts = np.empty((7, 3), dtype=np.float32)
+        
+        # 手势判断阈值（平方），并预先编译 classify_hand，避免首帧卡顿
+        self._thresholds = np.array(
+            [config.PINCH_THRESHOLD_SQ, config.FIST_THRESHOLD_SQ],
+            dtype=np.float64
+        )
+        classify_hand(np.zeros((7, 3), dtype=np.float32), self._thresholds)
+        
         # 手势识别状态
         self.current_gesture = "None"
         
+        # 跳帧推理状态（跟踪稳定时复用上一次的检测结果）
+        self.last_results = None
+        self.frames_since_detect = 0
+        
+        # 有可用的 OpenCL 设备时，推理前的图像预处理在 GPU 上完成
+        self.use_opencl = config.USE_OPENCL and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        
+        # 用一帧空白图像走一遍完整的预处理和推理进行预热
+        # 模型加载和 OpenCL 内核编译放在初始化阶段，而不是第一帧
+        warmup_frame = np.zeros((config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8)
+        self.hands.process(self.preprocess_frame(warmup_frame))
+        
     def detect_hand_landmarks(self, frame):
         """
         检测手部关键点
-        返回: landmarks 对象和处理后的 RGB 图像
+        已跟踪到手时每 INFERENCE_EVERY_N_FRAMES 帧才推理一次，中间帧复用上一次的结果
+        返回: landmarks 对象和处理后的 RGB 图像（复用结果时 RGB 图像为 None）
         """
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if (self.last_results is not None and
+                self.last_results.multi_hand_landmarks and
+                self.frames_since_detect < config.INFERENCE_EVERY_N_FRAMES - 1):
+            self.frames_since_detect += 1
+            return self.last_results, None
+        
+        rgb_frame = self.preprocess_frame(frame)
+        # 标记为只读，MediaPipe 可直接引用该内存而无需复制
+        rgb_frame.flags.writeable = False
         results = self.hands.process(rgb_frame)
+        rgb_frame.flags.writeable = True
+        self.last_results = results
+        self.frames_since_detect = 0
         return results, rgb_frame
     
+    def preprocess_frame(self, frame):
+        """
+        将 BGR 帧转换为送入 MediaPipe 的 RGB 图像
+        缩小后再推理；MediaPipe 输出的是归一化坐标，无需换算回原始分辨率
+        """
+        scale = config.INFERENCE_SCALE
+        
+        if self.use_opencl:
+            # 缩放和颜色转换交给 OpenCL，只把处理后的 RGB 图像下载回内存
+            uframe = cv2.UMat(frame)
+            if scale != 1.0:
+                uframe = cv2.resize(uframe, None, fx=scale, fy=scale,
+                                    interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(uframe, cv2.COLOR_BGR2RGB).get()
+        
+        if scale != 1.0:
+            small = cv2.resize(frame, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+            # 缩放结果是新分配的缓冲区，直接原地交换颜色通道，不再额外分配
+            return cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+        
+        # 原始帧还要用于绘制和显示，不能原地修改
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    
     def draw_landmarks(self, frame, results):
         """在图像上绘制手部关键点"""
         if results.multi_hand_landmarks:
@@ -69,152 +210,33 @@ class GestureDetector:
                 )
         return frame
     
-    def get_finger_tip_positions(self, landmarks):
+    def fill_finger_tip_positions(self, landmarks):
         """
-        获取手指尖端位置
-        返回: 字典包含拇指、食指、中指、无名指、小指的坐标
+        获取手指尖端位置，原地写入预分配的缓冲区（每帧不再分配新数组）
+        返回: (7, 3) 数组，依次为拇指、食指、中指、无名指、小指、手腕、手掌中心的坐标
+        注意：返回的数组会在下一帧被覆盖
         """
-        return {
-            'thumb': landmarks.landmark[4],      # 拇指尖
-            'index': landmarks.landmark[8],      # 食指尖
-            'middle': landmarks.landmark[12],    # 中指尖
-            'ring': landmarks.landmark[16],      # 无名指尖
-            'pinky': landmarks.landmark[20],     # 小指尖
-            'wrist': landmarks.landmark[0],      # 手腕
-            'palm': landmarks.landmark[9]        # 手掌中心
-        }
-    
-    def calculate_distance(self, point1, point2):
-        """计算两个关键点之间的欧氏距离"""
-        return np.sqrt(
-            (point1.x - point2.x) ** 2 +
-            (point1.y - point2.y) ** 2 +
-            (point1.z - point2.z) ** 2
-        )
-    
-    def detect_pinch(self, positions):
-        """
-        检测拇指和食指捏合手势（模拟鼠标左键）
-        不管其他手指状态，只要拇指和食指捏合就触发
-        """
-        # 拇指和食指距离
-        thumb_index_dist = self.calculate_distance(positions['thumb'], positions['index'])
-        
-        # 捏合条件：拇指食指很近即可
-        is_pinch = thumb_index_dist < config.PINCH_THRESHOLD
-        
-        return is_pinch
-    
-
-    def detect_only_index_up(self, positions):
-        """
-        检测是否只有食指伸出（用于鼠标移动）
-        其他手指应该收拢或半收拢
-        """
-        palm = positions['palm']
-        
-        # 食指距离（应该伸直）
-        index_dist = self.calculate_distance(positions['index'], palm)
-        # 中指距离（应该收拢）
-        middle_dist = self.calculate_distance(positions['middle'], palm)
-        # 无名指和小指
-        ring_dist = self.calculate_distance(positions['ring'], palm)
-        pinky_dist = self.calculate_distance(positions['pinky'], palm)
-        
-        # 只有食指伸出（放宽食指阈值，严格其他手指）
-        return (index_dist > 0.14 and 
-                middle_dist < 0.12 and 
-                ring_dist < 0.12 and 
-                pinky_dist < 0.12)
-    
-    def detect_thumb_index_open(self, positions):
-        """
-        检测食指和拇指是否都伸出张开（不是捏合）
-        """
-        palm = positions['palm']
-        
-        # 食指和拇指都应该伸直
-        thumb_dist = self.calculate_distance(positions['thumb'], palm)
-        index_dist = self.calculate_distance(positions['index'], palm)
-        
-        # 拇指和食指之间的距离（应该较远，表示张开）
-        thumb_index_dist = self.calculate_distance(positions['thumb'], positions['index'])
-        
-        # 食指和拇指都伸出，且距离较远（张开状态）
-        both_extended = (thumb_dist > 0.12 and index_dist > 0.15)
-        not_pinching = thumb_index_dist > config.PINCH_THRESHOLD
-        
-        return both_extended and not_pinching
+        pts = self._pts
+        lm = landmarks.landmark
+        for row, landmark_id in enumerate(FINGER_LANDMARK_IDS):
+            point = lm[landmark_id]
+            pts[row] = (point.x, point.y, point.z)
+        return pts
     
-    def detect_open_hand(self, positions):
-        """
-        检测手掌是否张开（五指伸展）
-        必须五指都伸展才识别为张开手掌
-        严格检测，避免与单食指混淆
-        """
-        palm = positions['palm']
-        
-        # 计算所有手指到手掌的距离
-        thumb_dist = self.calculate_distance(positions['thumb'], palm)
-        index_dist = self.calculate_distance(positions['index'], palm)
-        middle_dist = self.calculate_distance(positions['middle'], palm)
-        ring_dist = self.calculate_distance(positions['ring'], palm)
-        pinky_dist = self.calculate_distance(positions['pinky'], palm)
-        
-        # 所有手指都必须伸展（更严格的条件，避免单食指误触）
-        all_extended = (
-            thumb_dist > 0.13 and
-            index_dist > 0.15 and
-            middle_dist > 0.14 and
-            ring_dist > 0.14 and
-            pinky_dist > 0.14
-        )
-        
-        return all_extended
-    
-    def detect_fist(self, positions):
-        """
-        检测握拳手势（模拟鼠标右键）
-        必须五指紧握才触发，特别注意避免与拇指食指张开混淆
-        """
-        palm = positions['palm']
-        
-        # 计算所有指尖到手掌的距离
-        distances = [
-            self.calculate_distance(positions['thumb'], palm),
-            self.calculate_distance(positions['index'], palm),
-            self.calculate_distance(positions['middle'], palm),
-            self.calculate_distance(positions['ring'], palm),
-            self.calculate_distance(positions['pinky'], palm)
-        ]
-        avg_distance = np.mean(distances)
-        max_distance = max(distances)
-        
-        # 握拳条件：平均距离很小且所有手指都收拢（更严格）
-        # 如果食指或拇指伸出，则不是握拳
-        thumb_dist = distances[0]
-        index_dist = distances[1]
-        
-        is_fist = (avg_distance < config.FIST_THRESHOLD and 
-                   max_distance < config.FIST_THRESHOLD * 2.0 and
-                   thumb_dist < 0.10 and  # 拇指必须收拢
-                   index_dist < 0.10)      # 食指必须收拢
-        
-        return is_fist
-    
-    def detect_open_hand_swipe(self, positions, frame_height):
+    def detect_open_hand_swipe(self, positions, frame_height, is_open_hand):
         """
         检测五指张开时大幅度上下扫动
+        is_open_hand: 调用方已判断好的五指张开结果，这里不再重复判断
         返回: 'scroll_up', 'scroll_down', 或 None
         注意：手向下扫→向上滚动，手向上扫→向下滚动
         """
         # 首先检查是否是五指张开姿势
-        if not self.detect_open_hand(positions):
+        if not is_open_hand:
             self.prev_open_hand_y = None
             return None
         
         # 使用手掌中心的Y坐标
-        current_y = positions['palm'].y * frame_height
+        current_y = positions[PALM, 1] * frame_height
         
         if self.prev_open_hand_y is None:
             self.prev_open_hand_y = current_y
@@ -244,12 +266,13 @@ class GestureDetector:
         获取食指位置用于控制鼠标移动
         返回: (x, y) 归一化坐标
         """
-        index = positions['index']
-        return (index.x * frame_width, index.y * frame_height)
+        index = positions[INDEX]
+        return (float(index[0]) * frame_width, float(index[1]) * frame_height)
     
-    def recognize_gesture(self, results, frame_shape):
+    def recognize_gesture(self, results, frame_width, frame_height):
         """
         主要手势识别函数
+        frame_width, frame_height: 画面尺寸，用于把归一化坐标换算为画面坐标
         返回: 字典包含手势类型和相关数据
         """
         if not results.multi_hand_landmarks:
@@ -262,10 +285,10 @@ class GestureDetector:
             }
         
         landmarks = results.multi_hand_landmarks[0]
-        positions = self.get_finger_tip_positions(landmarks)
-        frame_height, frame_width = frame_shape[:2]
+        positions = self.fill_finger_tip_positions(landmarks)
+        gesture_flags = classify_hand(positions, self._thresholds)
         
-        current_time = time.time()
+        current_time = time.monotonic_ns()
         
         # 新逻辑优先级:
         # 1. 捏合 → 点击左键或长按1秒+移动
@@ -275,11 +298,11 @@ class GestureDetector:
         # 5. 五指张开滚动（大幅度扫动）
         
         # 1. 检测捏合手势（左键点击或长按1秒后拖拽）
-        is_pinching = self.detect_pinch(positions)
+        is_pinching = gesture_flags & GESTURE_PINCH
         if is_pinching:
             if not self.is_pinching:
                 # 刚开始捏合 - 触发按下
-                if current_time - self.last_click_time > config.CLICK_COOLDOWN:
+                if current_time - self.last_click_time > self._click_cooldown_ns:
                     self.is_pinching = True
                     self.pinch_start_time = current_time
                     self.last_click_time = current_time
@@ -291,7 +314,7 @@ class GestureDetector:
             else:
                 # 持续捏合 - 检查时长
                 pinch_duration = current_time - self.pinch_start_time
-                if pinch_duration > 1.0:  # 捏合超过1秒，允许拖拽
+                if pinch_duration > self._drag_delay_ns:  # 捏合超过1秒，允许拖拽
                     # 获取食指位置用于拖拽
                     index_pos = self.get_index_position(positions, frame_width, frame_height)
                     self.current_gesture = "Pinch Hold + Move (Dragging)"
@@ -317,8 +340,8 @@ class GestureDetector:
                 }
         
         # 2. 检测握拳手势（鼠标右键）
-        if self.detect_fist(positions):
-            if current_time - self.last_right_click_time > config.CLICK_COOLDOWN:
+        if gesture_flags & GESTURE_FIST:
+            if current_time - self.last_right_click_time > self._click_cooldown_ns:
                 self.current_gesture = "Fist (Right Click)"
                 self.last_right_click_time = current_time
                 return {
@@ -334,7 +357,7 @@ class GestureDetector:
                 }
         
         # 3. 只在单食指伸出时移动鼠标（优先于五指张开）
-        if self.detect_only_index_up(positions):
+        if gesture_flags & GESTURE_INDEX_ONLY:
             index_pos = self.get_index_position(positions, frame_width, frame_height)
             self.current_gesture = "Move (Index Only)"
             return {
@@ -343,7 +366,7 @@ class GestureDetector:
             }
         
         # 4. 检测食指和拇指张开（无操作）
-        if self.detect_thumb_index_open(positions):
+        if gesture_flags & GESTURE_THUMB_INDEX_OPEN:
             self.current_gesture = "Thumb + Index Open (No Action)"
             return {
                 'type': 'none',
@@ -351,9 +374,10 @@ class GestureDetector:
             }
         
         # 5. 检测五指张开大幅扫动（滚动）
-        if self.detect_open_hand(positions):
-            swipe_result = self.detect_open_hand_swipe(positions, frame_height)
-            if swipe_result and current_time - self.last_scroll_time > config.SCROLL_COOLDOWN:
+        is_open_hand = bool(gesture_flags & GESTURE_OPEN_HAND)
+        if is_open_hand:
+            swipe_result = self.detect_open_hand_swipe(positions, frame_height, is_open_hand)
+            if swipe_result and current_time - self.last_scroll_time > self._scroll_cooldown_ns:
                 self.last_scroll_time = current_time
                 if swipe_result == 'scroll_up':
                     self.current_gesture = "Open Hand Swipe Down (Scroll UP)"
@@ -375,157 +399,6 @@ class GestureDetector:
                     'data': None
                 }
         
-        # 2. 检测食指和拇指张开（无操作）
-        if self.detect_thumb_index_open(positions):
-            self.current_gesture = "Thumb + Index Open (No Action)"
-            return {
-                'type': 'none',
-                'data': None
-            }
-        
-        # 3. 检测捏合手势（左键点击或长按1秒后拖拽）
-        is_pinching = self.detect_pinch(positions)
-        if is_pinching:
-            if not self.is_pinching:
-                # 刚开始捏合 - 触发按下
-                if current_time - self.last_click_time > config.CLICK_COOLDOWN:
-                    self.is_pinching = True
-                    self.pinch_start_time = current_time
-                    self.last_click_time = current_time
-                    self.current_gesture = "Pinch Start (Left Press)"
-                    return {
-                        'type': 'left_press',
-                        'data': None
-                    }
-            else:
-                # 持续捏合 - 检查时长
-                pinch_duration = current_time - self.pinch_start_time
-                if pinch_duration > 1.0:  # 捏合超过1秒，允许拖拽
-                    # 获取食指位置用于拖拽
-                    index_pos = self.get_index_position(positions, frame_width, frame_height)
-                    self.current_gesture = "Pinch Hold + Move (Dragging)"
-                    return {
-                        'type': 'pinch_drag',
-                        'data': index_pos
-                    }
-                else:
-                    # 捏合但未超过1秒 - 只保持按下，不移动鼠标
-                    self.current_gesture = "Pinch Hold (Holding)"
-                    return {
-                        'type': 'left_hold',
-                        'data': None
-                    }
-        else:
-            # 松开捏合
-            if self.is_pinching:
-                self.is_pinching = False
-                self.current_gesture = "Pinch Release"
-                return {
-                    'type': 'left_release',
-                    'data': None
-                }
-        
-        # 2. 检测握拳手势（鼠标右键）
-        if self.detect_fist(positions):
-            if current_time - self.last_right_click_time > config.CLICK_COOLDOWN:
-                self.current_gesture = "Fist (Right Click)"
-                self.last_right_click_time = current_time
-                return {
-                    'type': 'right_click',
-                    'data': None
-                }
-            else:
-                # 握拳但在冷却中，不移动鼠标
-                self.current_gesture = "Fist (Cooldown)"
-                return {
-                    'type': 'none',
-                    'data': None
-                }
-        
-        # 3. 只在单食指伸出时移动鼠标（优先于五指张开）
-        if self.detect_only_index_up(positions):
-            index_pos = self.get_index_position(positions, frame_width, frame_height)
-            self.current_gesture = "Move (Index Only)"
-            return {
-                'type': 'move',
-                'data': index_pos
-            }
-        
-        # 4. 检测食指和拇指张开（无操作）
-        if self.detect_thumb_index_open(positions):
-            self.current_gesture = "Thumb + Index Open (No Action)"
-            return {
-                'type': 'none',
-                'data': None
-            }
-        
-        # 5. 检测五指张开大幅扫动（滚动）
-        if self.detect_open_hand(positions):
-            if not self.is_pinching:
-                # 刚开始捏合 - 触发按下
-                if current_time - self.last_click_time > config.CLICK_COOLDOWN:
-                    self.is_pinching = True
-                    self.pinch_start_time = current_time
-                    self.last_click_time = current_time
-                    self.current_gesture = "Pinch Start (Left Press)"
-                    return {
-                        'type': 'left_press',
-                        'data': None
-                    }
-            else:
-                # 持续捏合 - 检查时长
-                pinch_duration = current_time - self.pinch_start_time
-                if pinch_duration > 1.0:  # 捏合超过1秒，允许拖拽
-                    # 获取食指位置用于拖拽
-                    index_pos = self.get_index_position(positions, frame_width, frame_height)
-                    self.current_gesture = "Pinch Hold + Move (Dragging)"
-                    return {
-                        'type': 'pinch_drag',
-                        'data': index_pos
-                    }
-                else:
-                    # 捏合但未超过1秒 - 只保持按下，不移动鼠标
-                    self.current_gesture = "Pinch Hold (Holding)"
-                    return {
-                        'type': 'left_hold',
-                        'data': None
-                    }
-        else:
-            # 松开捏合
-            if self.is_pinching:
-                self.is_pinching = False
-                self.current_gesture = "Pinch Release"
-                return {
-                    'type': 'left_release',
-                    'data': None
-                }
-        
-        # 4. 检测握拳手势（鼠标右键）
-        if self.detect_fist(positions):
-            if current_time - self.last_right_click_time > config.CLICK_COOLDOWN:
-                self.current_gesture = "Fist (Right Click)"
-                self.last_right_click_time = current_time
-                return {
-                    'type': 'right_click',
-                    'data': None
-                }
-            else:
-                # 握拳但在冷却中，不移动鼠标
-                self.current_gesture = "Fist (Cooldown)"
-                return {
-                    'type': 'none',
-                    'data': None
-                }
-        
-        # 5. 只在单食指伸出时移动鼠标
-        if self.detect_only_index_up(positions):
-            index_pos = self.get_index_position(positions, frame_width, frame_height)
-            self.current_gesture = "Move (Index Only)"
-            return {
-                'type': 'move',
-                'data': index_pos
-            }
-        
         # 其他情况 - 不移动鼠标
         self.current_gesture = "Idle"
         return {
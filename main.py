@@ -5,9 +5,13 @@
 """
 
 import cv2
+import numpy as np
+import pyautogui
 import sys
 import time
 import os
+import queue
+import threading
 
 # 设置标准输出编码为 UTF-8（Windows 兼容）
 if sys.platform == "win32":
@@ -19,6 +23,78 @@ from mouse_controller import MouseController
 import config
 
 
+def put_latest(q, item):
+    """向单槽队列放入最新数据，丢弃尚未被取走的旧数据"""
+    try:
+        q.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        pass
+
+
+def capture_loop(cap, frame_queue, stop_event):
+    """采集线程：持续读取摄像头帧，只保留最新一帧"""
+    while not stop_event.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            print("警告: 无法读取摄像头画面")
+            stop_event.set()
+            break
+        
+        # 水平翻转（镜像效果）
+        frame = cv2.flip(frame, 1)
+        put_latest(frame_queue, frame)
+
+
+def inference_loop(gesture_detector, frame_queue, result_queue, stop_event):
+    """推理线程：对最新一帧执行手部关键点检测"""
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            results, _ = gesture_detector.detect_hand_landmarks(frame)
+            put_latest(result_queue, (frame, results))
+    except Exception as e:
+        print(f"\n手势检测线程发生错误: {e}")
+        stop_event.set()
+
+
+def render_text_sprite(text, font_scale, color, thickness):
+    """
+    预先渲染一段静态文字，之后每帧只需拷贝像素而不必重新绘制字形
+    返回: (文字图像, 文字像素掩码, 基线以上的高度)
+    """
+    (text_w, text_h), baseline = cv2.getTextSize(
+        text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
+    )
+    sprite = np.zeros((text_h + baseline, text_w, 3), dtype=np.uint8)
+    cv2.putText(
+        sprite,
+        text,
+        (0, text_h),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        font_scale,
+        color,
+        thickness
+    )
+    mask = sprite.any(axis=2)[:, :, np.newaxis]
+    return sprite, mask, text_h
+
+
+def blit_text_sprite(frame, text_sprite, x, y):
+    """将 render_text_sprite 的结果贴到画面上，(x, y) 为文字基线左端"""
+    sprite, mask, text_h = text_sprite
+    top = y - text_h
+    roi = frame[top:top + sprite.shape[0], x:x + sprite.shape[1]]
+    np.copyto(roi, sprite, where=mask)
+
+
 def main():
     print("=" * 60)
     print("手势控制鼠标程序 - Gesture Mouse Control")
@@ -42,7 +118,13 @@ def main():
     
     # 初始化摄像头
     print("\n正在初始化摄像头...")
-    cap = cv2.VideoCapture(config.CAMERA_INDEX)
+    # 指定低延迟的采集后端（Windows 默认的 MSMF 读取延迟较高）
+    if sys.platform == "win32":
+        cap = cv2.VideoCapture(config.CAMERA_INDEX, cv2.CAP_DSHOW)
+    elif sys.platform.startswith("linux"):
+        cap = cv2.VideoCapture(config.CAMERA_INDEX, cv2.CAP_V4L2)
+    else:
+        cap = cv2.VideoCapture(config.CAMERA_INDEX)
     
     if not cap.isOpened():
         print("错误: 无法打开摄像头！")
@@ -53,9 +135,12 @@ def main():
         return
     
     # 设置摄像头参数
+    # 请求 MJPG 格式，避免未压缩的 YUY2 受 USB 带宽限制
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
     cap.set(cv2.CAP_PROP_FPS, config.FPS)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 只缓存一帧，避免读到过时的画面
     
     # 初始化手势检测器和鼠标控制器
     print("正在初始化手势检测器...")
@@ -72,28 +157,52 @@ def main():
     start_time = time.time()
     fps = 0
     
+    # 窗口是否已经显示过（未创建的窗口查询属性也会返回 -1）
+    window_shown = False
+    
+    # 退出提示文字不变，只渲染一次
+    exit_hint = render_text_sprite("Press ESC or Q to exit", 0.5, (0, 0, 255), 1)
+    
+    # 手势坐标换算使用的画面尺寸在运行期间固定不变
+    frame_width = config.FRAME_WIDTH
+    frame_height = config.FRAME_HEIGHT
+    
+    # 采集与推理分别在独立线程中进行，主线程只处理最新的检测结果
+    # 限制 OpenCV 内部线程数，避免与 MediaPipe 的计算线程争抢 CPU
+    cv2.setNumThreads(1)
+    frame_queue = queue.Queue(maxsize=1)
+    result_queue = queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+    workers = [
+        threading.Thread(
+            target=capture_loop,
+            args=(cap, frame_queue, stop_event),
+            daemon=True
+        ),
+        threading.Thread(
+            target=inference_loop,
+            args=(gesture_detector, frame_queue, result_queue, stop_event),
+            daemon=True
+        ),
+    ]
+    for worker in workers:
+        worker.start()
+    
     try:
         while True:
-            # 读取摄像头帧
-            ret, frame = cap.read()
-            if not ret:
-                print("警告: 无法读取摄像头画面")
-                break
-            
-            # 水平翻转（镜像效果）
-            frame = cv2.flip(frame, 1)
-            
-            # 检测手部关键点
-            results, rgb_frame = gesture_detector.detect_hand_landmarks(frame)
-            
-            # 绘制手部关键点
-            if config.SHOW_HAND_LANDMARKS:
-                frame = gesture_detector.draw_landmarks(frame, results)
+            # 获取最新的帧及其检测结果
+            try:
+                frame, results = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if stop_event.is_set():
+                    break
+                continue
             
             # 识别手势
             gesture_result = gesture_detector.recognize_gesture(
-                results, 
-                frame.shape
+                results,
+                frame_width,
+                frame_height
             )
             
             # 执行鼠标操作
@@ -101,27 +210,41 @@ def main():
                 try:
                     mouse_controller.execute_gesture(
                         gesture_result,
-                        config.FRAME_WIDTH,
-                        config.FRAME_HEIGHT
+                        frame_width,
+                        frame_height
                     )
+                except pyautogui.FailSafeException:
+                    print("\n紧急停止触发！程序退出。")
+                    break
                 except Exception as e:
-                    if "FailSafeException" in str(type(e)):
-                        print("\n紧急停止触发！程序退出。")
-                        break
-                    else:
-                        print(f"鼠标操作错误: {e}")
+                    print(f"鼠标操作错误: {e}")
             else:
                 # 没有检测到手时，重置平滑参数
                 mouse_controller.reset_smoothing()
             
-            # 显示摄像头画面
-            if config.SHOW_CAMERA_FEED:
-                # 计算FPS
-                frame_count += 1
-                if frame_count % 30 == 0:
-                    elapsed_time = time.time() - start_time
-                    fps = 30 / elapsed_time
-                    start_time = time.time()
+            # 计算FPS
+            frame_count += 1
+            if frame_count % 30 == 0:
+                elapsed_time = time.time() - start_time
+                fps = 30 / elapsed_time
+                start_time = time.time()
+            
+            # 显示摄像头画面（每 RENDER_EVERY_N_FRAMES 帧绘制一次，节省 CPU 给手势检测）
+            if config.SHOW_CAMERA_FEED and frame_count % config.RENDER_EVERY_N_FRAMES == 0:
+                # 检测窗口是否被关闭（窗口显示过之后才检查）
+                # 必须在 imshow 之前检查：imshow 会重新创建已关闭的同名窗口
+                if window_shown:
+                    try:
+                        if cv2.getWindowProperty('Gesture Mouse Control', cv2.WND_PROP_VISIBLE) < 1:
+                            print("\n窗口已关闭，程序退出。")
+                            break
+                    except:
+                        print("\n窗口已关闭，程序退出。")
+                        break
+                
+                # 绘制手部关键点
+                if config.SHOW_HAND_LANDMARKS:
+                    frame = gesture_detector.draw_landmarks(frame, results)
                 
                 # 在画面上显示信息
                 gesture_text = gesture_detector.get_current_gesture_text()
@@ -145,36 +268,21 @@ def main():
                     2
                 )
                 
-                cv2.putText(
-                    frame,
-                    "Press ESC or Q to exit",
-                    (10, frame.shape[0] - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 0, 255),
-                    1
-                )
+                blit_text_sprite(frame, exit_hint, 10, frame.shape[0] - 10)
                 
                 # 显示窗口
                 cv2.imshow('Gesture Mouse Control', frame)
+                window_shown = True
             
-            # 检测退出键（ESC 或 Q）和窗口关闭
-            key = cv2.waitKey(1) & 0xFF
+            # 检测退出键（ESC 或 Q）
+            # pollKey 只处理窗口事件、不等待；主循环本身阻塞在检测结果队列上
+            key = cv2.pollKey() & 0xFF
             if key == 27:  # ESC
                 print("\n用户按下 ESC 键，程序退出。")
                 break
             elif key == ord('q') or key == ord('Q'):  # Q 键
                 print("\n用户按下 Q 键，程序退出。")
                 break
-            
-            # 检测窗口是否被关闭
-            try:
-                if cv2.getWindowProperty('Gesture Mouse Control', cv2.WND_PROP_VISIBLE) < 1:
-                    print("\n窗口已关闭，程序退出。")
-                    break
-            except:
-                print("\n窗口已关闭，程序退出。")
-                break
     
     except KeyboardInterrupt:
         print("\n用户中断程序（Ctrl+C），程序退出。")
@@ -187,9 +295,13 @@ def main():
     finally:
         # 释放资源
         print("\n正在释放资源...")
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1.0)
         cap.release()
         cv2.destroyAllWindows()
         gesture_detector.release()
+        mouse_controller.release()
         print("资源释放完成。")
         print("=" * 60)
         print("程序已安全退出。感谢使用！")
@@ -0,0 +1,244 @@
+"""
+鼠标输入后端模块
+直接调用操作系统接口发送鼠标事件，省去 PyAutoGUI 每次调用的参数检查和暂停
+"""
+
+import sys
+import pyautogui
+
+
+class MouseBackend:
+    """
+    鼠标后端基类
+    move_to/press/release/click/scroll 可以只把事件写入缓冲区，调用 flush 后才真正提交
+    """
+    
+    def send(self, events):
+        """
+        依次执行一批鼠标事件并一次提交
+        events: [(方法名, 参数元组), ...]，方法名为 move_to/press/release/click/scroll
+        """
+        for name, args in events:
+            getattr(self, name)(*args)
+        self.flush()
+    
+    def flush(self):
+        """提交缓冲区中的事件（立即发送事件的后端无需处理）"""
+        pass
+
+
+class PyAutoGUIBackend(MouseBackend):
+    """通用后端：平台接口不可用时退回 PyAutoGUI"""
+    
+    def move_to(self, x, y):
+        pyautogui.moveTo(x, y, duration=0, _pause=False)
+    
+    def press(self, button):
+        pyautogui.mouseDown(button=button, _pause=False)
+    
+    def release(self, button):
+        pyautogui.mouseUp(button=button, _pause=False)
+    
+    def click(self, button):
+        pyautogui.click(button=button, _pause=False)
+    
+    def scroll(self, amount):
+        pyautogui.scroll(amount, _pause=False)
+
+
+class Win32Backend(MouseBackend):
+    """Windows 后端：通过 ctypes 调用 user32，事件先收集为 INPUT 数组，flush 时一次 SendInput 提交"""
+    
+    INPUT_MOUSE = 0
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_RIGHTDOWN = 0x0008
+    MOUSEEVENTF_RIGHTUP = 0x0010
+    MOUSEEVENTF_WHEEL = 0x0800
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+    SM_CXSCREEN = 0
+    SM_CYSCREEN = 1
+    
+    BUTTON_FLAGS = {
+        'left': (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+        'right': (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+    }
+    
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [
+                ('dx', wintypes.LONG),
+                ('dy', wintypes.LONG),
+                ('mouseData', wintypes.DWORD),
+                ('dwFlags', wintypes.DWORD),
+                ('time', wintypes.DWORD),
+                ('dwExtraInfo', ctypes.c_size_t),
+            ]
+        
+        # MOUSEINPUT 是 INPUT 联合体中最大的成员，只声明它即可得到正确的结构体大小
+        class INPUT(ctypes.Structure):
+            _fields_ = [
+                ('type', wintypes.DWORD),
+                ('mi', MOUSEINPUT),
+            ]
+        
+        self._ctypes = ctypes
+        self._INPUT = INPUT
+        self._user32 = ctypes.windll.user32
+        self._screen_width = self._user32.GetSystemMetrics(self.SM_CXSCREEN)
+        self._screen_height = self._user32.GetSystemMetrics(self.SM_CYSCREEN)
+        self._inputs = []  # 待提交的 (dx, dy, mouseData, dwFlags)
+    
+    def move_to(self, x, y):
+        # 像素坐标转换为 SendInput 使用的 0~65535 归一化坐标（取像素中心，避免取整误差）
+        dx = (2 * x + 1) * 65536 // (2 * self._screen_width)
+        dy = (2 * y + 1) * 65536 // (2 * self._screen_height)
+        self._inputs.append((dx, dy, 0, self.MOUSEEVENTF_MOVE | self.MOUSEEVENTF_ABSOLUTE))
+    
+    def press(self, button):
+        self._inputs.append((0, 0, 0, self.BUTTON_FLAGS[button][0]))
+    
+    def release(self, button):
+        self._inputs.append((0, 0, 0, self.BUTTON_FLAGS[button][1]))
+    
+    def click(self, button):
+        self.press(button)
+        self.release(button)
+    
+    def scroll(self, amount):
+        # 与 PyAutoGUI 在 Windows 上的行为一致：amount 直接作为滚轮增量
+        # mouseData 为 DWORD，负的滚动量按补码传入
+        self._inputs.append((0, 0, amount & 0xFFFFFFFF, self.MOUSEEVENTF_WHEEL))
+    
+    def flush(self):
+        """通过一次 SendInput 调用提交收集到的全部事件"""
+        inputs = self._inputs
+        if not inputs:
+            return
+        self._inputs = []
+        
+        array = (self._INPUT * len(inputs))()
+        for item, (dx, dy, data, flags) in zip(array, inputs):
+            item.type = self.INPUT_MOUSE
+            item.mi.dx = dx
+            item.mi.dy = dy
+            item.mi.mouseData = data
+            item.mi.dwFlags = flags
+        self._user32.SendInput(len(inputs), array, self._ctypes.sizeof(self._INPUT))
+
+
+class X11Backend(MouseBackend):
+    """Linux 后端：通过 XTest 扩展发送事件（需要 python-xlib），flush 时统一同步"""
+    
+    BUTTONS = {'left': 1, 'right': 3}
+    SCROLL_UP = 4
+    SCROLL_DOWN = 5
+    
+    def __init__(self):
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self._X = X
+        self._fake_input = xtest.fake_input
+        self._display = display.Display()
+    
+    def move_to(self, x, y):
+        self._fake_input(self._display, self._X.MotionNotify, x=x, y=y)
+    
+    def press(self, button):
+        self._fake_input(self._display, self._X.ButtonPress, self.BUTTONS[button])
+    
+    def release(self, button):
+        self._fake_input(self._display, self._X.ButtonRelease, self.BUTTONS[button])
+    
+    def click(self, button):
+        self.press(button)
+        self.release(button)
+    
+    def scroll(self, amount):
+        # 与 PyAutoGUI 在 X11 上的行为一致：每格滚动对应一次滚轮按键
+        detail = self.SCROLL_UP if amount > 0 else self.SCROLL_DOWN
+        for _ in range(abs(amount)):
+            self._fake_input(self._display, self._X.ButtonPress, detail)
+            self._fake_input(self._display, self._X.ButtonRelease, detail)
+    
+    def flush(self):
+        """请求都写入缓冲区后只同步一次"""
+        self._display.sync()
+
+
+class QuartzBackend(MouseBackend):
+    """macOS 后端：通过 Quartz 事件服务发送事件（需要 pyobjc-framework-Quartz）"""
+    
+    def __init__(self):
+        import Quartz
+        self._Quartz = Quartz
+        self._buttons = {
+            'left': (Quartz.kCGEventLeftMouseDown, Quartz.kCGEventLeftMouseUp,
+                     Quartz.kCGMouseButtonLeft),
+            'right': (Quartz.kCGEventRightMouseDown, Quartz.kCGEventRightMouseUp,
+                      Quartz.kCGMouseButtonRight),
+        }
+        self._left_down = False  # 左键按下时移动需要发送拖拽事件
+    
+    def _post_mouse_event(self, event_type, position, mouse_button):
+        Q = self._Quartz
+        event = Q.CGEventCreateMouseEvent(None, event_type, position, mouse_button)
+        Q.CGEventPost(Q.kCGHIDEventTap, event)
+    
+    def _current_position(self):
+        Q = self._Quartz
+        return Q.CGEventGetLocation(Q.CGEventCreate(None))
+    
+    def move_to(self, x, y):
+        Q = self._Quartz
+        if self._left_down:
+            event_type = Q.kCGEventLeftMouseDragged
+        else:
+            event_type = Q.kCGEventMouseMoved
+        self._post_mouse_event(event_type, (x, y), Q.kCGMouseButtonLeft)
+    
+    def press(self, button):
+        down, _, mouse_button = self._buttons[button]
+        self._post_mouse_event(down, self._current_position(), mouse_button)
+        if button == 'left':
+            self._left_down = True
+    
+    def release(self, button):
+        _, up, mouse_button = self._buttons[button]
+        self._post_mouse_event(up, self._current_position(), mouse_button)
+        if button == 'left':
+            self._left_down = False
+    
+    def click(self, button):
+        self.press(button)
+        self.release(button)
+    
+    def scroll(self, amount):
+        Q = self._Quartz
+        event = Q.CGEventCreateScrollWheelEvent(None, Q.kCGScrollEventUnitLine, 1, amount)
+        Q.CGEventPost(Q.kCGHIDEventTap, event)
+
+
+def create_backend():
+    """
+    按当前平台选择鼠标后端
+    平台接口不可用（缺少依赖或无法连接显示服务）时退回 PyAutoGUI
+    """
+    if sys.platform == "win32":
+        backend_class = Win32Backend
+    elif sys.platform == "darwin":
+        backend_class = QuartzBackend
+    elif sys.platform.startswith("linux"):
+        backend_class = X11Backend
+    else:
+        return PyAutoGUIBackend()
+    
+    try:
+        return backend_class()
+    except Exception as e:
+        print(f"无法使用系统鼠标接口（{e}），改用 PyAutoGUI")
+        return PyAutoGUIBackend()
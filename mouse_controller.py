@@ -1,11 +1,73 @@
 """
 鼠标控制器模块
-使用 PyAutoGUI 控制鼠标移动、点击和滚轮
+控制鼠标移动、点击和滚轮（事件由 mouse_backend 直接发送给操作系统）
 """
 
+import logging
 import pyautogui
 import numpy as np
+from numba import njit
+import threading
+import time
+from collections import deque
 import config
+from mouse_backend import create_backend
+
+# 每次鼠标操作的记录使用 DEBUG 级别，默认不输出，也不做格式化
+# 排查问题时可在主程序中调用 logging.basicConfig(level=logging.DEBUG) 打开
+log = logging.getLogger(__name__)
+
+# 坐标计算使用 Q16.16 定点数：整数部分为像素，低 16 位为小数
+Q16_SHIFT = 16
+Q16_ONE = 1 << Q16_SHIFT
+
+
+def to_q16(value):
+    """将浮点数转换为 Q16.16 定点数"""
+    return int(round(value * Q16_ONE))
+
+
+def build_map_and_smooth(ax_q, bx_q, ay_q, by_q, xmax_q, ymax_q, one_minus_sf_q):
+    """
+    按固定的映射参数生成专用的坐标计算函数
+    参数（Q16.16 定点数）在运行期间不变，作为闭包常量直接编译进函数
+    """
+    @njit(fastmath=True)
+    def map_and_smooth(hand_x, hand_y, has_prev, pos):
+        """
+        将手部坐标映射到屏幕并做指数移动平均平滑（除输入外全部为定点整数运算）
+        映射为 ax * hand + b，结果限制在 [0, max] 内并取整后再参与平滑
+        pos: 长度为 2 的 int64 数组，传入上一次的平滑坐标，原地写入新的平滑坐标（不分配返回值）
+        """
+        screen_x = ((np.int64(hand_x * Q16_ONE) * ax_q) >> Q16_SHIFT) + bx_q
+        screen_y = ((np.int64(hand_y * Q16_ONE) * ay_q) >> Q16_SHIFT) + by_q
+        
+        # 限制在屏幕范围内
+        if screen_x < 0:
+            screen_x = 0
+        elif screen_x > xmax_q:
+            screen_x = xmax_q
+        if screen_y < 0:
+            screen_y = 0
+        elif screen_y > ymax_q:
+            screen_y = ymax_q
+        
+        # 去掉小数部分（取整到像素）
+        pixel_x = (screen_x >> Q16_SHIFT) << Q16_SHIFT
+        pixel_y = (screen_y >> Q16_SHIFT) << Q16_SHIFT
+        
+        if not has_prev:
+            pos[0] = pixel_x
+            pos[1] = pixel_y
+            return
+        
+        # β*prev + (1-β)*cur 改写为 prev + (1-β)*(cur - prev)，每个轴只需一次乘法
+        prev_x = pos[0]
+        prev_y = pos[1]
+        pos[0] = prev_x + ((one_minus_sf_q * (pixel_x - prev_x)) >> Q16_SHIFT)
+        pos[1] = prev_y + ((one_minus_sf_q * (pixel_y - prev_y)) >> Q16_SHIFT)
+    
+    return map_and_smooth
 
 
 class MouseController:
@@ -15,171 +77,300 @@ class MouseController:
         
         # PyAutoGUI 安全设置
         pyautogui.FAILSAFE = True  # 鼠标移到屏幕角落时抛出异常以停止程序
-        pyautogui.PAUSE = 0.01     # 每次操作后的暂停时间
+        pyautogui.PAUSE = 0        # 操作后不暂停；只有点击通过 MIN_CLICK_INTERVAL 限速
         
-        # 平滑移动相关
-        self.prev_mouse_x = None
-        self.prev_mouse_y = None
+        # 鼠标事件后端（按平台选择系统接口）
+        self._backend = create_backend()
         
-        # 坐标映射范围（减去边缘padding）
-        self.map_width = self.screen_width - 2 * config.SCREEN_PADDING
-        self.map_height = self.screen_height - 2 * config.SCREEN_PADDING
+        # 鼠标事件由独立的发送线程执行，避免系统调用阻塞手势识别
+        # 同一帧内产生的事件先收集在 _pending 中，帧结束时作为一批交给后端一次提交
+        # 连续的移动事件只保留最新的一个，点击等离散事件按顺序全部执行
+        self._pending = []
+        self._tx = deque()
+        self._tx_cond = threading.Condition()
+        # 后端（如 PyAutoGUI）在发送线程中触发紧急停止时记录下来，由主线程重新抛出
+        self._failsafe_event = threading.Event()
+        self._sender = threading.Thread(target=self._sender_loop, daemon=True)
+        self._sender.start()
         
-        print(f"屏幕分辨率: {self.screen_width} x {self.screen_height}")
-    
-    def map_coordinates(self, hand_x, hand_y, frame_width, frame_height):
-        """
-        将摄像头坐标映射到屏幕坐标
-        hand_x, hand_y: 手部在摄像头画面中的坐标
-        返回: 屏幕坐标 (screen_x, screen_y)
-        """
-        # 归一化到 0-1 范围
-        norm_x = hand_x / frame_width
-        norm_y = hand_y / frame_height
+        # 上一次点击的时间（用于点击限速）
+        self._last_click_ts = 0.0
         
-        # 注意：frame 已经在主程序中进行了镜像翻转，这里不需要再次翻转
+        # 左键是否处于按下状态（只在状态变化时发送按下/释放事件）
+        self._left_down = False
         
-        # 映射到屏幕坐标（加上padding）
-        screen_x = config.SCREEN_PADDING + norm_x * self.map_width
-        screen_y = config.SCREEN_PADDING + norm_y * self.map_height
+        # 平滑移动相关：平滑后的坐标保存在预先分配的数组中，由 map_and_smooth 原地更新
+        self._scratch = np.zeros(2, dtype=np.int64)
+        self._has_prev = False  # _scratch 中是否已有上一次的平滑坐标
+        self._last_emitted = (None, None)  # 上一次实际发出的鼠标位置
         
-        # 限制在屏幕范围内
-        screen_x = max(0, min(self.screen_width - 1, screen_x))
-        screen_y = max(0, min(self.screen_height - 1, screen_y))
+        # 屏幕坐标上限
+        self._xmax = self.screen_width - 1
+        self._ymax = self.screen_height - 1
+        self._xmax_q = self._xmax << Q16_SHIFT
+        self._ymax_q = self._ymax << Q16_SHIFT
+        
+        # 按配置的画面尺寸预先生成坐标计算函数，避免首次移动鼠标时等待 JIT 编译
+        self._frame_dims = (None, None)
+        self.reload_config()
+        self._update_mapping(config.FRAME_WIDTH, config.FRAME_HEIGHT)
+        
+        # 手势类型到处理函数的映射，参数均为 (手势数据, 画面宽度, 画面高度)
+        self._dispatch = {
+            # 单食指移动鼠标
+            'move': self._move_to_gesture,
+            # 捏合开始 - 鼠标左键按下
+            'left_press': lambda data, fw, fh: self.left_press(),
+            # 捏合持续 - 保持按下状态（不移动）
+            'left_hold': lambda data, fw, fh: None,
+            # 捏合拖拽 - 左键按下且移动鼠标
+            'pinch_drag': self._move_to_gesture,
+            # 捏合松开 - 鼠标左键释放
+            'left_release': lambda data, fw, fh: self.left_release(),
+            # 握拳 - 鼠标右键点击
+            'right_click': lambda data, fw, fh: self.right_click(),
+            # 五指张开扫动 - 鼠标滚轮滚动
+            'scroll': lambda data, fw, fh: self.scroll(data) if data else None,
+        }
         
-        return int(screen_x), int(screen_y)
+        print(f"屏幕分辨率: {self.screen_width} x {self.screen_height}")
     
-    def smooth_coordinates(self, current_x, current_y):
+    def reload_config(self):
         """
-        使用指数移动平均平滑鼠标坐标
-        减少抖动，使移动更流畅
+        读取 config 中的参数并缓存为实例属性
+        鼠标移动每帧都会执行，避免每次都查找 config 模块属性；运行时修改 config 后调用此方法生效
         """
-        if self.prev_mouse_x is None or self.prev_mouse_y is None:
-            self.prev_mouse_x = current_x
-            self.prev_mouse_y = current_y
-            return current_x, current_y
+        # 平滑系数由等效的滑动平均窗口 N 推导：β = (N-1)/(N+1)，即 1-β = 2/(N+1)
+        window_n = getattr(config, 'SMOOTH_WINDOW_N', None)
+        if window_n is not None:
+            self._smooth_factor = (window_n - 1) / (window_n + 1)
+        else:
+            self._smooth_factor = float(config.SMOOTH_FACTOR)
+        self._one_minus_sf = 1.0 - self._smooth_factor
+        self._one_minus_sf_q = to_q16(self._one_minus_sf)
+        self._padding = config.SCREEN_PADDING
+        # 防抖死区随平滑系数缩放：平滑越弱，残留的抖动越大，死区也越大
+        self._deadband = max(1, int(round(self._one_minus_sf * config.JITTER_PX_SCALE)))
+        self._min_click_interval = config.MIN_CLICK_INTERVAL
+        self._scroll_amount = int(config.SCROLL_SENSITIVITY * 3)
         
-        # 指数移动平均
-        smooth_x = (config.SMOOTH_FACTOR * self.prev_mouse_x + 
-                   (1 - config.SMOOTH_FACTOR) * current_x)
-        smooth_y = (config.SMOOTH_FACTOR * self.prev_mouse_y + 
-                   (1 - config.SMOOTH_FACTOR) * current_y)
+        # 坐标映射范围（减去边缘padding）
+        self.map_width = self.screen_width - 2 * self._padding
+        self.map_height = self.screen_height - 2 * self._padding
         
-        self.prev_mouse_x = smooth_x
-        self.prev_mouse_y = smooth_y
+        # 映射参数改变后，按当前画面尺寸重新生成坐标计算函数
+        if self._frame_dims[0] is not None:
+            self._update_mapping(*self._frame_dims)
+    
+    def _update_mapping(self, frame_width, frame_height):
+        """
+        按画面尺寸计算坐标映射系数，并生成以这些系数为常量的坐标计算函数
+        padding + hand_x / frame_width * map_width 合并为 ax * hand_x + bx，每帧省去除法
+        """
+        self._frame_dims = (frame_width, frame_height)
+        self._map_and_smooth = build_map_and_smooth(
+            to_q16(self.map_width / frame_width),
+            self._padding << Q16_SHIFT,
+            to_q16(self.map_height / frame_height),
+            self._padding << Q16_SHIFT,
+            self._xmax_q, self._ymax_q,
+            self._one_minus_sf_q
+        )
         
-        return int(smooth_x), int(smooth_y)
+        # 立即用同样的参数类型调用一次完成编译（写入临时数组，不影响平滑状态）
+        self._map_and_smooth(0.0, 0.0, False, np.zeros(2, dtype=np.int64))
     
     def move_mouse(self, hand_x, hand_y, frame_width, frame_height):
         """
         移动鼠标到指定位置
+        坐标映射和指数移动平均平滑由按参数生成的 map_and_smooth 一次完成
+        hand_x, hand_y: 手部在摄像头画面中的坐标
         """
         try:
-            # 映射坐标
-            screen_x, screen_y = self.map_coordinates(
-                hand_x, hand_y, frame_width, frame_height
-            )
+            # 映射到屏幕坐标（加上padding）
+            # 注意：frame 已经在主程序中进行了镜像翻转，这里不需要再次翻转
+            # 画面尺寸在运行期间固定，坐标计算函数只在尺寸变化时重新生成
+            if self._frame_dims != (frame_width, frame_height):
+                self._update_mapping(frame_width, frame_height)
+            
+            # 映射、限制范围并做指数移动平均平滑，减少抖动
+            # 手势检测每帧只给出一个坐标，递推形式每次只需 O(1) 计算，
+            # 因此不保存历史坐标做批量平滑（那样每帧都要对整个窗口重新加权求和）
+            # 参数类型与 _update_mapping 中预编译时保持一致，避免重新编译
+            pos = self._scratch
+            self._map_and_smooth(float(hand_x), float(hand_y), self._has_prev, pos)
+            self._has_prev = True
+            smooth_x = int(pos[0] >> Q16_SHIFT)
+            smooth_y = int(pos[1] >> Q16_SHIFT)
             
-            # 应用平滑
-            smooth_x, smooth_y = self.smooth_coordinates(screen_x, screen_y)
+            # 紧急停止：目标位置落在 FAILSAFE_POINTS（默认左上角）时停止程序
+            # 必须在死区判断之前检查，否则距上次位置很近的角落目标会被跳过
+            if pyautogui.FAILSAFE and (smooth_x, smooth_y) in pyautogui.FAILSAFE_POINTS:
+                raise pyautogui.FailSafeException(
+                    "鼠标移到了紧急停止位置，程序停止"
+                )
+            
+            # 与上一次发出的位置在 x、y 方向都相差不到死区像素时不再移动
+            last_x, last_y = self._last_emitted
+            deadband = self._deadband
+            if (last_x is not None and
+                    abs(smooth_x - last_x) < deadband and abs(smooth_y - last_y) < deadband):
+                return
             
             # 移动鼠标（直接使用坐标，不再额外乘以灵敏度）
-            pyautogui.moveTo(
-                smooth_x,
-                smooth_y,
-                duration=0
-            )
+            self._post('move_to', smooth_x, smooth_y)
+            self._last_emitted = (smooth_x, smooth_y)
         except pyautogui.FailSafeException:
             print("检测到紧急停止（鼠标移到屏幕角落）")
             raise
     
+    @staticmethod
+    def _append_event(events, event):
+        """追加事件；若最后一个是移动事件，新的移动事件直接替换它（只保留最新位置）"""
+        if event[0] == 'move_to' and events and events[-1][0] == 'move_to':
+            events[-1] = event
+        else:
+            events.append(event)
+    
+    def _post(self, name, *args):
+        """
+        记录一个鼠标事件，等到 _flush 时再交给发送线程
+        name: 后端方法名（move_to/press/release/click/scroll）
+        """
+        self._append_event(self._pending, (name, args))
+    
+    def _flush(self):
+        """
+        将本帧收集的事件作为一批交给发送线程
+        若队尾的一批还没有开始发送，直接并入其中，由后端一次提交
+        """
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        with self._tx_cond:
+            tx = self._tx
+            if tx and tx[-1] is not None:
+                batch = tx[-1]
+                for event in pending:
+                    self._append_event(batch, event)
+            else:
+                tx.append(pending)
+            self._tx_cond.notify()
+    
+    def _sender_loop(self):
+        """发送线程：依次将队列中的每批事件交给后端，收到 None 时退出"""
+        while True:
+            with self._tx_cond:
+                while not self._tx:
+                    self._tx_cond.wait()
+                batch = self._tx.popleft()
+            if batch is None:
+                break
+            if self._failsafe_event.is_set():
+                # 已触发紧急停止，不再发送任何事件
+                continue
+            try:
+                self._backend.send(batch)
+            except pyautogui.FailSafeException:
+                self._failsafe_event.set()
+            except Exception as e:
+                print(f"鼠标操作失败: {e}")
+    
+    def _click_allowed(self):
+        """距离上一次点击超过 MIN_CLICK_INTERVAL 才允许再次点击"""
+        now = time.monotonic()
+        if now - self._last_click_ts < self._min_click_interval:
+            return False
+        self._last_click_ts = now
+        return True
+    
     def left_click(self):
         """执行鼠标左键点击"""
-        try:
-            pyautogui.click(button='left')
-            print("执行: 左键点击")
-        except Exception as e:
-            print(f"左键点击失败: {e}")
+        if not self._click_allowed():
+            return
+        self._post('click', 'left')
+        log.debug("执行: 左键点击")
     
     def left_press(self):
         """按下鼠标左键（不释放）"""
-        try:
-            pyautogui.mouseDown(button='left')
-            print("执行: 左键按下")
-        except Exception as e:
-            print(f"左键按下失败: {e}")
+        if self._left_down:
+            return
+        self._left_down = True
+        self._post('press', 'left')
+        log.debug("执行: 左键按下")
     
     def left_release(self):
         """释放鼠标左键"""
-        try:
-            pyautogui.mouseUp(button='left')
-            print("执行: 左键释放")
-        except Exception as e:
-            print(f"左键释放失败: {e}")
+        if not self._left_down:
+            return
+        self._left_down = False
+        self._post('release', 'left')
+        log.debug("执行: 左键释放")
     
     def right_click(self):
         """执行鼠标右键点击"""
-        try:
-            pyautogui.click(button='right')
-            print("执行: 右键点击")
-        except Exception as e:
-            print(f"右键点击失败: {e}")
+        if not self._click_allowed():
+            return
+        self._post('click', 'right')
+        log.debug("执行: 右键点击")
     
     def scroll(self, direction):
         """
         执行鼠标滚轮滚动
         direction: 'up' 或 'down'
         """
-        try:
-            scroll_amount = int(config.SCROLL_SENSITIVITY * 3)
-            if direction == 'up':
-                pyautogui.scroll(scroll_amount)
-                print(f"执行: 向上滚动 {scroll_amount}")
-            elif direction == 'down':
-                pyautogui.scroll(-scroll_amount)
-                print(f"执行: 向下滚动 {scroll_amount}")
-        except Exception as e:
-            print(f"滚动失败: {e}")
+        scroll_amount = self._scroll_amount
+        if direction == 'up':
+            self._post('scroll', scroll_amount)
+            log.debug("执行: 向上滚动 %d", scroll_amount)
+        elif direction == 'down':
+            self._post('scroll', -scroll_amount)
+            log.debug("执行: 向下滚动 %d", scroll_amount)
     
     def execute_gesture(self, gesture_result, frame_width, frame_height):
         """
         根据手势识别结果执行相应的鼠标操作
         gesture_result: gesture_detector 返回的字典
+        各操作内部不再单独捕获异常，出错时（包括紧急停止）由调用方统一处理
         """
-        gesture_type = gesture_result['type']
-        gesture_data = gesture_result['data']
-        
-        if gesture_type == 'move' and gesture_data:
-            # 单食指移动鼠标
-            hand_x, hand_y = gesture_data
-            self.move_mouse(hand_x, hand_y, frame_width, frame_height)
-            
-        elif gesture_type == 'left_press':
-            # 捏合开始 - 鼠标左键按下
-            self.left_press()
-        
-        elif gesture_type == 'left_hold':
-            # 捏合持续 - 保持按下状态（不移动）
-            pass
-        
-        elif gesture_type == 'pinch_drag' and gesture_data:
-            # 捏合拖拽 - 左键按下且移动鼠标
+        handler = self._dispatch.get(gesture_result['type'])
+        if handler is not None:
+            self._check_failsafe()
+            handler(gesture_result['data'], frame_width, frame_height)
+            self._flush()
+    
+    def _check_failsafe(self):
+        """
+        紧急停止：实际鼠标位置位于 FAILSAFE_POINTS（默认左上角）时抛出 FailSafeException
+        事件由后端直接发送，不再经过 PyAutoGUI 的检查，因此每帧发送事件前在这里读取一次鼠标位置
+        发送线程中由后端触发的紧急停止也在这里重新抛出
+        """
+        if self._failsafe_event.is_set() or (
+                pyautogui.FAILSAFE and pyautogui.position() in pyautogui.FAILSAFE_POINTS):
+            print("检测到紧急停止（鼠标移到屏幕角落）")
+            raise pyautogui.FailSafeException(
+                "鼠标移到了紧急停止位置，程序停止"
+            )
+    
+    def _move_to_gesture(self, gesture_data, frame_width, frame_height):
+        """移动鼠标到手势给出的位置（没有位置数据时忽略）"""
+        if gesture_data:
             hand_x, hand_y = gesture_data
             self.move_mouse(hand_x, hand_y, frame_width, frame_height)
-        
-        elif gesture_type == 'left_release':
-            # 捏合松开 - 鼠标左键释放
-            self.left_release()
-            
-        elif gesture_type == 'right_click':
-            # 握拳 - 鼠标右键点击
-            self.right_click()
-            
-        elif gesture_type == 'scroll' and gesture_data:
-            # 五指张开扫动 - 鼠标滚轮滚动
-            self.scroll(gesture_data)
     
     def reset_smoothing(self):
-        """重置平滑参数（当手势中断后重新开始）"""
-        self.prev_mouse_x = None
-        self.prev_mouse_y = None
+        """重置平滑参数（当手势中断后重新开始），并释放仍按下的左键，避免按键卡住"""
+        self._has_prev = False
+        self._last_emitted = (None, None)
+        if self._left_down:
+            self.left_release()
+            self._flush()
+    
+    def release(self):
+        """等待已提交的鼠标事件执行完毕并停止发送线程"""
+        self._flush()
+        with self._tx_cond:
+            self._tx.append(None)
+            self._tx_cond.notify()
+        self._sender.join(timeout=1.0)